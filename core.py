@@ -0,0 +1,610 @@
+import itertools
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO, StringIO
+
+# Núcleo sem Streamlit: usado pelo app (via database.py) e pela linha de comando (fichamento.py).
+# pandas, gspread, bibtexparser e rispy são importados só quando usados, para o CLI abrir rápido.
+
+# Configuração de Escopo
+SCOPE = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+NOME_PLANILHA = "Fichamento_DB"
+
+# Variáveis de ambiente aceitas pelo CLI
+ENV_CREDENCIAIS = "FICHAMENTO_CREDENCIAIS"  # caminho para .json/.toml ou o próprio JSON
+ENV_PLANILHA = "FICHAMENTO_PLANILHA"
+ENV_PARTICOES = "FICHAMENTO_PARTICOES"  # caminho para .json ou o próprio JSON
+SECRETS_STREAMLIT = os.path.join(".streamlit", "secrets.toml")
+
+# Cabeçalhos das abas (a coluna 'versao' controla edições concorrentes)
+COLS_OBRAS = ['id', 'titulo', 'subtitulo', 'autor', 'edicao', 'local', 'editora', 'ano',
+              'paginas', 'volume', 'folhas', 'serie', 'notas', 'is_online', 'url', 'data_acesso', 'tipo', 'versao']
+COLS_FICHAS = ['id', 'obra_id', 'pagina', 'conceito', 'ideia_central', 'definicao_conceito',
+               'relacao_biblio', 'citacoes', 'tags', 'versao']
+COLS_PLANILHA = {"obras": COLS_OBRAS, "fichas": COLS_FICHAS}
+MAX_LEITURAS_PARALELAS = 8
+
+class ConflitoDeEdicao(Exception):
+    """O registro foi alterado por outra sessão depois de ser carregado."""
+
+class AbaAusente(Exception):
+    """Uma partição configurada aponta para uma aba (ou planilha) que ainda não existe."""
+
+# --- CREDENCIAIS E CONEXÃO ---
+def carregar_credenciais(caminho=None):
+    # Ordem: argumento, variável de ambiente, .streamlit/secrets.toml
+    origem = caminho or os.environ.get(ENV_CREDENCIAIS)
+    if not origem and os.path.exists(SECRETS_STREAMLIT): origem = SECRETS_STREAMLIT
+    if not origem:
+        raise RuntimeError(f"Credenciais não encontradas. Use --credenciais ou a variável {ENV_CREDENCIAIS}.")
+    if origem.lstrip().startswith('{'):
+        return json.loads(origem)
+    if origem.endswith('.toml'):
+        import tomllib
+        with open(origem, 'rb') as fp:
+            return dict(tomllib.load(fp)["gcp_service_account"])
+    with open(origem, encoding='utf-8') as fp:
+        return json.load(fp)
+
+def conectar(creds_dict, nome_planilha=NOME_PLANILHA):
+    import gspread
+    from oauth2client.service_account import ServiceAccountCredentials
+    creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, SCOPE)
+    client = gspread.authorize(creds)
+    return client.open(nome_planilha)
+
+# --- ID HELPERS ---
+def _as_int(valor):
+    try: return int(valor)
+    except (TypeError, ValueError): return 0
+
+def get_next_id(worksheet):
+    # Maior ID da coluna A + 1: a última linha nem sempre tem o maior ID (ex.: após rebalance ou reindex)
+    col_values = worksheet.col_values(1)[1:] # Coluna A é ID
+    return max([_as_int(v) for v in col_values] + [0]) + 1
+
+# --- IMPORTAÇÃO DE ARQUIVOS (CSV do modelo, RIS, BibTeX) ---
+def normalizar_coluna(t):
+    return ''.join(c for c in unicodedata.normalize('NFD', str(t)) if unicodedata.category(c) != 'Mn').lower().strip()
+
+def _sem_chaves(t):
+    return str(t).replace('{','').replace('}','')
+
+def ler_referencias(nome_arquivo, conteudo):
+    # conteudo = bytes do arquivo; retorna lista de dicts prontos para importar_obras()
+    res = []
+    if nome_arquivo.endswith('.csv'):
+        import pandas as pd
+        try: df = pd.read_csv(BytesIO(conteudo), sep=None, engine='python')
+        except: df = pd.read_csv(BytesIO(conteudo), sep=';', encoding='utf-8-sig')
+        df.columns = [normalizar_coluna(c) for c in df.columns]
+        if 'titulo' in df.columns:
+            for r in df.to_dict('records'):
+                ano = re.search(r'\d{4}', str(r.get('ano',0)))
+                res.append({'titulo': str(r.get('titulo','')), 'subtitulo': str(r.get('subtitulo','')), 'autor': str(r.get('autor','')), 'ano': int(ano.group()) if ano else 0, 'local': str(r.get('local','S.l.')), 'editora': str(r.get('editora','S.n.')), 'edicao': str(r.get('edicao','')), 'tipo': str(r.get('tipo','Livro')), 'url': str(r.get('url','')), 'paginas': str(r.get('paginas',''))})
+    elif nome_arquivo.endswith('.ris'):
+        import rispy
+        for e in rispy.load(StringIO(conteudo.decode("utf-8"))):
+            res.append({'titulo':e.get('primary_title',''), 'subtitulo':'', 'autor':"; ".join(e.get('authors',[])), 'ano':int(e.get('year',0)) if e.get('year') else 0, 'local':e.get('place_published','S.l.'), 'editora':e.get('publisher','S.n.'), 'edicao':'', 'tipo':'Artigo' if e.get('type_of_reference')=='JOUR' else 'Livro', 'url':e.get('url',''), 'paginas':''})
+    elif nome_arquivo.endswith('.bib'):
+        import bibtexparser
+        for e in bibtexparser.loads(conteudo.decode("utf-8")).entries:
+            res.append({'titulo':_sem_chaves(e.get('title','')), 'subtitulo':'', 'autor':_sem_chaves(e.get('author','')), 'ano':int(e.get('year',0)) if e.get('year') else 0, 'local':_sem_chaves(e.get('address','S.l.')), 'editora':_sem_chaves(e.get('publisher','S.n.')), 'edicao':'', 'tipo':'Livro', 'url':'', 'paginas':''})
+    return res
+
+def _paralelo(funcao, itens):
+    # Chamadas à API em threads (leituras de várias abas/planilhas ao mesmo tempo)
+    itens = list(itens)
+    if len(itens) <= 1: return [funcao(i) for i in itens]
+    with ThreadPoolExecutor(max_workers=min(len(itens), MAX_LEITURAS_PARALELAS)) as ex:
+        return list(ex.map(funcao, itens))
+
+def _faixas(linhas):
+    # [(número da linha, id)] -> faixas de linhas consecutivas, de baixo para cima (cada faixa também decrescente)
+    faixas = []
+    for item in sorted(linhas, reverse=True):
+        if faixas and item[0] == faixas[-1][-1][0] - 1: faixas[-1].append(item)
+        else: faixas.append([item])
+    return faixas
+
+def _publico(df):
+    # Remove as colunas internas (_particao, _linha) antes de entregar o frame
+    return df.drop(columns=[c for c in df.columns if str(c).startswith('_')])
+
+# --- PARTICIONAMENTO DAS FICHAS (opcional) ---
+class Particionamento:
+    """Distribui as fichas em várias abas (ou planilhas) por faixa de ID da obra ou por ano da obra.
+
+    config = {"criterio": "obra_id" | "ano",
+              "particoes": [{"aba": "fichas", "ate": 500}, {"aba": "fichas_2", "planilha": "Fichamento_DB_2"}]}
+    A ficha vai para a primeira partição com valor <= 'ate'; a última (sem 'ate') recebe o restante.
+    Sem config, tudo fica na aba 'fichas' (comportamento original).
+    """
+
+    def __init__(self, config=None):
+        config = dict(config or {})
+        self.criterio = config.get('criterio', 'obra_id')
+        self.particoes = [dict(p) for p in config.get('particoes') or [{'aba': 'fichas'}]]
+        if self.criterio not in ('obra_id', 'ano'):
+            raise ValueError(f"Critério de partição inválido: {self.criterio} (use 'obra_id' ou 'ano').")
+
+    def destino(self, obra_id, ano=None):
+        valor = _as_int(ano if self.criterio == 'ano' else obra_id)
+        for i, p in enumerate(self.particoes):
+            if p.get('ate') is None or valor <= _as_int(p['ate']): return i
+        return len(self.particoes) - 1
+
+def carregar_particoes(origem=None):
+    # origem: dict (ex.: st.secrets["particoes"]), JSON, caminho de .json ou variável de ambiente
+    origem = origem or os.environ.get(ENV_PARTICOES)
+    if not origem: return Particionamento()
+    if not isinstance(origem, str): return Particionamento(origem)
+    if origem.lstrip().startswith('{'): return Particionamento(json.loads(origem))
+    with open(origem, encoding='utf-8') as fp:
+        return Particionamento(json.load(fp))
+
+# --- REPOSITÓRIO (Planilha + frames em memória) ---
+_seq_versao = itertools.count(1)
+
+class Repositorio:
+    """Acesso às abas 'obras' e 'fichas' com cache de frames corrigido in-place.
+
+    ttl (segundos) descarta os frames periodicamente; None mantém até limpar_cache().
+    particionamento distribui as fichas em várias abas, lidas em paralelo e unidas num só frame.
+    """
+
+    def __init__(self, sh, ttl=None, particionamento=None):
+        self.sh = sh
+        self.ttl = ttl
+        self.particionamento = particionamento or Particionamento()
+        self._planilhas = {}
+        self.lock = threading.Lock()
+        self.frames = {}
+        self.derivados = {}
+        self.versao = next(_seq_versao)
+        self._carregado_em = time.monotonic()
+
+    # --- ABAS E PARTIÇÕES ---
+    def _planilha(self, nome):
+        # Partições podem ficar em outras planilhas (mesma conta de serviço)
+        if not nome: return self.sh
+        if nome not in self._planilhas: self._planilhas[nome] = self.sh.client.open(nome)
+        return self._planilhas[nome]
+
+    def _n_particoes(self, nome):
+        return len(self.particionamento.particoes) if nome == "fichas" else 1
+
+    def _worksheet(self, nome, particao=0):
+        from gspread.exceptions import SpreadsheetNotFound, WorksheetNotFound
+        if nome != "fichas": return self.sh.worksheet(nome)
+        p = self.particionamento.particoes[particao]
+        try:
+            return self._planilha(p.get('planilha')).worksheet(p['aba'])
+        except (WorksheetNotFound, SpreadsheetNotFound):
+            # O app não cria abas de partição: erro explícito em vez de uma lista de fichas vazia
+            onde = f" na planilha '{p['planilha']}'" if p.get('planilha') else ""
+            raise AbaAusente(f"A aba de fichas '{p['aba']}'{onde} não existe. Rode 'python fichamento.py sync' para criá-la.")
+
+    def _mapa_anos(self):
+        # { id da obra: ano }, para rotear fichas quando o critério é o ano
+        def calcular():
+            df = self._get_frame("obras")
+            return dict(zip(df['id'].astype(str), df['ano'])) if not df.empty and 'ano' in df.columns else {}
+        return self.memo(('anos_obras',), calcular)
+
+    def _particao_ficha(self, obra_id):
+        ano = self._mapa_anos().get(str(obra_id)) if self.particionamento.criterio == 'ano' else None
+        return self.particionamento.destino(obra_id, ano)
+
+    def _proximo_id(self, nome):
+        # IDs únicos entre todas as partições: maior ID de todas + 1.
+        # Lido da planilha a cada escrita (não do cache), pois outras sessões e o CLI também gravam.
+        return max(_paralelo(lambda i: get_next_id(self._worksheet(nome, i)), range(self._n_particoes(nome))))
+
+    # --- CACHE ---
+    def _get_frames(self, *nomes):
+        # Lê de uma vez (em paralelo) todas as abas/partições que ainda não estão em cache
+        import pandas as pd
+        self._expirar_se_preciso()
+        faltando = [n for n in nomes if n not in self.frames]
+        if faltando and self.sh:
+            tarefas = [(n, i) for n in faltando for i in range(self._n_particoes(n))]
+            def ler(tarefa):
+                df = pd.DataFrame(self._worksheet(*tarefa).get_all_records())
+                df['_particao'] = tarefa[1]
+                df['_linha'] = range(2, len(df) + 2)  # linha na planilha
+                return df
+            lidos = _paralelo(ler, tarefas)
+            for n in faltando:
+                partes = [df for t, df in zip(tarefas, lidos) if t[0] == n]
+                # Partições vazias ficam de fora para não converter os IDs inteiros em float
+                self.frames[n] = pd.concat([df for df in partes if not df.empty] or partes[:1], ignore_index=True)
+        return [self.frames.get(n, pd.DataFrame()) for n in nomes]
+
+    def _get_frame(self, nome):
+        return self._get_frames(nome)[0]
+
+    def _expirar_se_preciso(self):
+        # TTL vale para os frames e para tudo o que foi memorizado a partir deles
+        if self.ttl and time.monotonic() - self._carregado_em > self.ttl:
+            self.limpar_cache()
+
+    def _nova_versao(self):
+        # 'versao' muda a cada escrita; 'derivados' guarda resultados calculados sobre essa versão
+        self.versao = next(_seq_versao)
+        self.derivados.clear()
+
+    def _invalidar(self, nome=None):
+        if nome: self.frames.pop(nome, None)
+        else:
+            self.frames.clear()
+            self._carregado_em = time.monotonic()
+        self._nova_versao()
+
+    def memo(self, chave, calcular):
+        # Resultado calculado uma vez por versão dos dados (descartado a cada escrita ou ao expirar o TTL)
+        self._expirar_se_preciso()
+        if chave in self.derivados: return self.derivados[chave]
+        versao = self.versao
+        valor = calcular()
+        # Repositório compartilhado entre sessões: se houve escrita durante o cálculo, o resultado já
+        # nasceu velho e não é guardado (a próxima chamada recalcula sobre os dados novos)
+        if self.versao == versao: self.derivados[chave] = valor
+        return valor
+
+    def em_memo(self, chave):
+        self._expirar_se_preciso()
+        return chave in self.derivados
+
+    def get_data_version(self):
+        self._expirar_se_preciso()
+        return self.versao
+
+    def limpar_cache(self):
+        self._invalidar()
+
+    # --- CREATE ---
+    def add_obra(self, titulo, subtitulo, autor, edicao, local, editora, ano,
+                 paginas, volume, folhas, serie, notas, is_online, url, data_acesso, tipo):
+        if not self.sh: return
+        wk = self.sh.worksheet("obras")
+        new_id = get_next_id(wk)
+
+        row = [new_id, titulo, subtitulo, autor, edicao, local, editora, ano,
+               paginas, volume, folhas, serie, notas, is_online, url, data_acesso, tipo, 1]
+        wk.append_row(row)
+
+        # Recarrega só a aba de obras para que a nova obra apareça imediatamente
+        self._invalidar("obras")
+
+    def add_ficha(self, obra_id, pagina, conceito, ideia_central, definicao, relacao, citacoes, tags):
+        if not self.sh: return
+        new_id = self._proximo_id("fichas")
+        wk = self._worksheet("fichas", self._particao_ficha(obra_id))
+
+        row = [new_id, obra_id, pagina, conceito, ideia_central, definicao, relacao, citacoes, tags, 1]
+        wk.append_row(row)
+
+        # Recarrega só a aba de fichas para atualizar a tabela
+        self._invalidar("fichas")
+
+    def _append_lote(self, nome, linhas):
+        # Uma leitura de ID e uma única chamada append_rows por partição, independente do tamanho do lote
+        if not self.sh or not linhas: return 0
+        prox = self._proximo_id(nome)
+        grupos = {}
+        for i, linha in enumerate(linhas):
+            particao = self._particao_ficha(linha[0]) if nome == "fichas" else 0  # linha[0] = obra_id
+            grupos.setdefault(particao, []).append([prox + i] + linha + [1])
+        _paralelo(lambda g: self._worksheet(nome, g[0]).append_rows(g[1]), grupos.items())
+        self._invalidar(nome)
+        return len(linhas)
+
+    def importar_obras(self, registros):
+        # registros no formato de ler_referencias()
+        linhas = [[i['titulo'], i['subtitulo'], i['autor'], i['edicao'], i['local'], i['editora'], i['ano'], i['paginas'],
+                   "", "", "", "Importado", 1 if len(i['url'])>5 else 0, i['url'], "", i['tipo']] for i in registros]
+        return self._append_lote("obras", linhas)
+
+    def importar_fichas(self, registros):
+        # registros = dicts com as colunas de COLS_FICHAS (id e versao são gerados)
+        linhas = [[str(r.get(c, '')) for c in COLS_FICHAS[1:-1]] for r in registros]
+        return self._append_lote("fichas", linhas)
+
+    # --- UPDATE (Envia só as células alteradas e corrige o cache in-place) ---
+    def get_versao(self, nome, registro_id):
+        df = self._get_frame(nome)
+        if df.empty or 'versao' not in df.columns: return 0
+        linha = df[df['id'].astype(str) == str(registro_id)]
+        return _as_int(linha['versao'].iloc[0]) if not linha.empty else 0
+
+    def _procurar(self, nome, registro_id):
+        # Partição indicada pelo cache primeiro; se não estiver lá, procura nas demais em paralelo
+        df = self.frames.get(nome)
+        reg = df[df['id'].astype(str) == str(registro_id)] if df is not None and not df.empty else []
+        dica = int(reg['_particao'].iloc[0]) if len(reg) else None
+        def buscar(i):
+            wk = self._worksheet(nome, i)
+            return wk, wk.find(str(registro_id), in_column=1)
+        grupos = [[dica]] if dica is not None else []
+        grupos.append([i for i in range(self._n_particoes(nome)) if i != dica])
+        for grupo in grupos:
+            for wk, cell in _paralelo(buscar, grupo):
+                if cell: return wk, cell
+        return None, None
+
+    def _localizar_linha(self, nome, df, registro_id):
+        # Tenta a posição conhecida no cache (1 leitura); se a planilha mudou, procura pelo ID
+        reg = df[df['id'].astype(str) == str(registro_id)] if not df.empty else []
+        if len(reg):
+            wk = self._worksheet(nome, int(reg['_particao'].iloc[0]))
+            linha = int(reg['_linha'].iloc[0])
+            cabecalho, valores = wk.batch_get(['1:1', f'{linha}:{linha}'])
+            valores = valores[0] if valores else []
+            if valores and str(valores[0]) == str(registro_id):
+                return linha, wk, cabecalho[0], valores
+        wk, cell = self._procurar(nome, registro_id)
+        if not cell: return None, None, [], []
+        return cell.row, wk, wk.row_values(1), wk.row_values(cell.row)
+
+    def _patch_frame(self, nome, registro_id, valores):
+        # Corrige uma cópia e troca a referência: leitores sem o lock nunca veem um frame pela metade
+        atual = self.frames.get(nome)
+        if atual is not None and not atual.empty:
+            df = atual.copy()
+            mask = df['id'].astype(str) == str(registro_id)
+            for col, v in valores.items():
+                if col not in df.columns: df[col] = ""
+                if df[col].dtype != object: df[col] = df[col].astype(object)
+                df.loc[mask, col] = v
+            if self.frames.get(nome) is atual: self.frames[nome] = df  # não ressuscita um frame invalidado
+        self._nova_versao()
+
+    def _update_registro(self, nome, registro_id, novos_dados, versao=None):
+        from gspread.utils import rowcol_to_a1
+        if not self.sh: return False
+        with self.lock:
+            df = self._get_frame(nome)
+            if versao is None: versao = self.get_versao(nome, registro_id)
+
+            linha, wk, cabecalho, valores = self._localizar_linha(nome, df, registro_id)
+            if not linha: return False
+            atual = dict(zip(cabecalho, valores))
+            versao_atual = _as_int(atual.get('versao'))
+            if versao_atual != _as_int(versao):
+                raise ConflitoDeEdicao(f"{nome} #{registro_id} foi alterado em outra sessão (versão {versao_atual}, esperada {versao}).")
+
+            # Diff: só as células que mudaram
+            alterados = {col: v for col, v in novos_dados.items()
+                         if col in cabecalho and col not in ('id', 'versao') and str(atual.get(col, '')) != str(v)}
+            if not alterados: return True
+
+            updates = [{'range': rowcol_to_a1(linha, cabecalho.index(col) + 1), 'values': [[v]]} for col, v in alterados.items()]
+            if 'versao' not in cabecalho:
+                # Planilhas antigas: cria a coluna de versão na mesma chamada
+                cabecalho = cabecalho + ['versao']
+                updates.append({'range': rowcol_to_a1(1, len(cabecalho)), 'values': [['versao']]})
+            updates.append({'range': rowcol_to_a1(linha, cabecalho.index('versao') + 1), 'values': [[versao_atual + 1]]})
+            wk.batch_update(updates)
+
+            self._patch_frame(nome, registro_id, {**alterados, 'versao': versao_atual + 1})
+        return True
+
+    def update_obra(self, obra_id, novos_dados, versao=None):
+        return self._update_registro("obras", obra_id, novos_dados, versao)
+
+    def update_ficha(self, ficha_id, novos_dados, versao=None):
+        return self._update_registro("fichas", ficha_id, novos_dados, versao)
+
+    # --- READ (Resultados memorizados por versão dos dados) ---
+    def get_frame(self, nome):
+        # Cópia do frame bruto da aba, com as partições unidas (usado em exportações/backup)
+        return _publico(self._get_frame(nome))
+
+    def get_obras(self):
+        return self.memo(('obras',), self._get_obras)
+
+    def _get_obras(self):
+        df = self._get_frame("obras")
+        if df.empty: return []
+        return [(d['id'], d['titulo'], d['subtitulo'], d['autor'], d['ano']) for d in df.to_dict('records')]
+
+    def get_todas_obras_detalhadas(self, termo=""):
+        return self.memo(('obras_detalhadas', termo), lambda: self._get_todas_obras_detalhadas(termo))
+
+    def _get_todas_obras_detalhadas(self, termo):
+        df = _publico(self._get_frame("obras"))
+
+        if df.empty: return []
+
+        df = df.astype(str) # Evita erros de tipos misturados
+
+        if termo:
+            mask = df.apply(lambda x: x.str.contains(termo, case=False)).any(axis=1)
+            df = df[mask]
+
+        cols_order = ['id', 'titulo', 'subtitulo', 'autor', 'ano', 'local', 'editora',
+                      'paginas', 'volume', 'folhas', 'serie', 'notas', 'edicao',
+                      'is_online', 'url', 'data_acesso', 'tipo']
+
+        for c in cols_order:
+            if c not in df.columns: df[c] = ""
+
+        return df[cols_order].values.tolist()
+
+    def get_fichas_completas(self):
+        return self.memo(('fichas_completas',), self._get_fichas_completas)
+
+    def _get_fichas_completas(self):
+        import pandas as pd
+        try:
+            # Obras e todas as partições de fichas são lidas em paralelo
+            df_fichas, df_obras = self._get_frames("fichas", "obras")
+        except AbaAusente:
+            raise
+        except:
+            return []
+
+        if df_fichas.empty: return []
+        if df_obras.empty: return []
+
+        df_fichas = _publico(df_fichas)
+        df_obras = _publico(df_obras)
+        df_fichas['obra_id'] = df_fichas['obra_id'].astype(str)
+        df_obras['id'] = df_obras['id'].astype(str)
+
+        df_obras = df_obras.rename(columns={'id': 'obra_id_ref'})
+
+        full_df = pd.merge(df_fichas, df_obras, left_on='obra_id', right_on='obra_id_ref', how='inner')
+
+        lista_final = []
+        for _, row in full_df.iterrows():
+            ficha_part = [
+                row.get('id', ''), row.get('obra_id', ''), row.get('pagina', ''), row.get('conceito', ''),
+                row.get('ideia_central', ''), row.get('definicao_conceito', ''), row.get('relacao_biblio', ''),
+                row.get('citacoes', ''), row.get('tags', ''), None, None
+            ]
+            obra_part = [
+                row.get('obra_id_ref', ''), row.get('titulo', ''), row.get('subtitulo', ''), row.get('autor', ''),
+                row.get('ano', ''), row.get('local', ''), row.get('editora', ''), row.get('paginas', ''),
+                row.get('volume', ''), row.get('folhas', ''), row.get('serie', ''), row.get('notas', ''),
+                row.get('edicao', ''), row.get('is_online', ''), row.get('url', ''), row.get('data_acesso', ''),
+                row.get('tipo', '')
+            ]
+            lista_final.append(ficha_part + obra_part)
+
+        return lista_final
+
+    def search_fichas(self, termo):
+        todos = self.get_fichas_completas()
+        resultado = []
+        t = str(termo).lower()
+        for item in todos:
+            texto = f"{item[3]} {item[7]} {item[8]} {item[12]}".lower()
+            if t in texto:
+                resultado.append(item)
+        return resultado
+
+    # --- DELETE ---
+    def delete_ficha(self, ficha_id):
+        if not self.sh: return
+        try:
+            wk, cell = self._procurar("fichas", ficha_id)
+            if cell:
+                wk.delete_rows(cell.row)
+                self._invalidar("fichas") # Recarrega a aba de fichas (as linhas mudaram de posição)
+        except: pass
+
+    # --- MANUTENÇÃO (usada pelo CLI) ---
+    def init_db(self):
+        # Só a planilha principal (1 chamada de worksheets()); as abas das partições são criadas pelo CLI
+        if not self.sh: return
+        self._criar_abas([(None, nome, cols) for nome, cols in COLS_PLANILHA.items()])
+
+    def _criar_particoes(self):
+        # Abas das partições (podem estar em outras planilhas): usado por sincronizar/rebalancear, não pelo app
+        self._criar_abas([(p.get('planilha'), p['aba'], COLS_FICHAS) for p in self.particionamento.particoes])
+
+    def _criar_abas(self, abas):
+        existing_worksheets = {}
+        for planilha, aba, cols in abas:
+            sh = self._planilha(planilha)
+            # Pega lista de nomes de abas existentes para evitar o erro "Already Exists"
+            if planilha not in existing_worksheets:
+                existing_worksheets[planilha] = [ws.title for ws in sh.worksheets()]
+            if aba not in existing_worksheets[planilha]:
+                try:
+                    wk = sh.add_worksheet(aba, 1000, 20)
+                    wk.append_row(cols)
+                except: pass # Se der erro (ex: criou em paralelo), ignora
+
+    def sincronizar(self):
+        # Cria abas ausentes, adiciona a coluna 'versao' e preenche versões vazias (1 escrita por aba)
+        from gspread.utils import rowcol_to_a1
+        if not self.sh: return {}
+        self.init_db()
+        self._criar_particoes()
+        resultado = {}
+        for wk in [self._worksheet(n, i) for n in COLS_PLANILHA for i in range(self._n_particoes(n))]:
+            valores = wk.get_all_values()
+            if not valores: continue
+            cabecalho = valores[0]
+            if 'versao' not in cabecalho:
+                if len(cabecalho) >= wk.col_count: wk.add_cols(1)
+                cabecalho = cabecalho + ['versao']
+            col = cabecalho.index('versao')
+            coluna = [['versao']] + [[_as_int(l[col]) if len(l) > col and _as_int(l[col]) > 0 else 1] for l in valores[1:]]
+            wk.batch_update([{'range': f"{rowcol_to_a1(1, col + 1)}:{rowcol_to_a1(len(coluna), col + 1)}", 'values': coluna}])
+            resultado[wk.title] = len(coluna) - 1
+        self.limpar_cache()
+        return resultado
+
+    def reindexar(self, nome):
+        # Atribui novos IDs a linhas com ID vazio, não numérico ou duplicado em qualquer partição (1 escrita por aba)
+        from gspread.utils import rowcol_to_a1
+        if not self.sh: return 0
+        wks = [self._worksheet(nome, i) for i in range(self._n_particoes(nome))]
+        colunas = _paralelo(lambda wk: wk.col_values(1)[1:], wks)
+        prox = max([_as_int(i) for ids in colunas for i in ids] + [0]) + 1
+        vistos, total = set(), 0
+        for wk, ids in zip(wks, colunas):
+            updates = []
+            for pos, valor in enumerate(ids):
+                n = _as_int(valor)
+                if n <= 0 or n in vistos:
+                    n, prox = prox, prox + 1
+                    updates.append({'range': rowcol_to_a1(pos + 2, 1), 'values': [[n]]})
+                vistos.add(n)
+            if updates: wk.batch_update(updates)
+            total += len(updates)
+        if total: self._invalidar(nome)
+        return total
+
+    def rebalancear(self):
+        # Move para a partição correta as fichas que estão fora da faixa (após mudar ou criar partições)
+        if not self.sh: return {}
+        self.init_db()
+        self._criar_particoes()
+        n = self._n_particoes("fichas")
+        wks = [self._worksheet("fichas", i) for i in range(n)]
+        valores = _paralelo(lambda wk: wk.get_all_values(), wks)
+        cabecalhos = [v[0] if v else COLS_FICHAS for v in valores]
+        mover = {i: [] for i in range(n)}    # destino -> linhas (na ordem do cabeçalho do destino)
+        remover = {i: [] for i in range(n)}  # origem -> [(número da linha, id)]
+        for origem, linhas in enumerate(valores):
+            cab = cabecalhos[origem]
+            for pos, linha in enumerate(linhas[1:], start=2):
+                if not any(linha): continue
+                registro = dict(zip(cab, linha))
+                destino = self._particao_ficha(registro.get('obra_id', ''))
+                if destino != origem:
+                    mover[destino].append([registro.get(c, '') for c in cabecalhos[destino]])
+                    remover[origem].append((pos, str(registro.get('id', '')).strip()))
+
+        # Primeiro copia (1 append_rows por destino), depois apaga da origem de baixo para cima.
+        # Deve rodar com o app parado (sem escritas): mesmo assim, antes de apagar cada faixa confere na
+        # coluna A se os IDs ainda são os lidos; o que mudou de linha é relocalizado pelo ID (ou ignorado)
+        _paralelo(lambda d: wks[d].append_rows(mover[d]), [d for d in mover if mover[d]])
+        def apagar(origem):
+            wk = wks[origem]
+            faixas = _faixas(remover[origem])
+            atuais = wk.batch_get([f"A{f[-1][0]}:A{f[0][0]}" for f in faixas])
+            pendentes = []
+            for faixa, valores_a in zip(faixas, atuais):
+                ids = [str(v[0]).strip() if v else '' for v in valores_a]
+                if ids == [i for _, i in reversed(faixa)]: wk.delete_rows(faixa[-1][0], faixa[0][0])
+                else: pendentes += [i for _, i in faixa]
+            if not pendentes: return
+            linha_do_id = {}  # id -> primeira linha onde aparece (uma passada pela coluna)
+            for pos, v in enumerate(wk.col_values(1)[1:], start=2): linha_do_id.setdefault(str(v).strip(), pos)
+            achadas = [(linha_do_id[i], i) for i in set(pendentes) if i and i in linha_do_id]
+            for faixa in _faixas(achadas): wk.delete_rows(faixa[-1][0], faixa[0][0])
+        _paralelo(apagar, [o for o in remover if remover[o]])
+
+        if any(remover.values()): self._invalidar("fichas")
+        return {wks[i].title: len(mover[i]) for i in range(n)}
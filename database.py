@@ -1,186 +1,91 @@
-import pandas as pd
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
 import streamlit as st
+import core
+import exportacao
+import referencias
+from core import AbaAusente, ConflitoDeEdicao  # exceções usadas pelo app como db.<Exceção>
 
-# Configuração de Escopo
-SCOPE = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+# Adaptador Streamlit: credenciais de st.secrets e cache compartilhado entre sessões.
+# Toda a lógica de dados fica em core.py (também usado pelo CLI fichamento.py).
 
 # --- CONEXÃO (Cache Resource = Mantém a conexão aberta) ---
 @st.cache_resource
 def get_connection():
     try:
-        # Tenta pegar dos segredos do Streamlit
-        creds_dict = dict(st.secrets["gcp_service_account"])
-        creds = ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, SCOPE)
-        client = gspread.authorize(creds)
-        # Tenta abrir a planilha
-        sheet = client.open("Fichamento_DB") 
-        return sheet
+        # Tenta pegar dos segredos do Streamlit e abrir a planilha
+        return core.conectar(dict(st.secrets["gcp_service_account"]))
     except Exception as e:
-        st.error(f"Erro ao conectar na planilha Google Sheets. Verifique o nome 'Fichamento_DB' e o compartilhamento. Detalhe: {e}")
+        st.error(f"Erro ao conectar na planilha Google Sheets. Verifique o nome '{core.NOME_PLANILHA}' e o compartilhamento. Detalhe: {e}")
         return None
 
-# --- ID HELPERS ---
-def get_next_id(worksheet):
-    col_values = worksheet.col_values(1) # Coluna A é ID
-    if len(col_values) <= 1: return 1
+# --- PARTIÇÕES (opcional: seção [particoes] em secrets.toml ou FICHAMENTO_PARTICOES) ---
+def get_particionamento():
     try:
-        last_val = int(col_values[-1])
-        return last_val + 1
-    except:
-        return len(col_values) + 1
+        return core.carregar_particoes(st.secrets.get("particoes"))
+    except Exception as e:
+        st.error(f"Configuração de partições inválida; usando só a aba 'fichas'. Detalhe: {e}")
+        return core.Particionamento()
+
+# --- REPOSITÓRIO (Cache Resource = mesmos frames para todas as sessões; TTL de 5 minutos) ---
+@st.cache_resource
+def get_repo():
+    return core.Repositorio(get_connection(), ttl=300, particionamento=get_particionamento())
 
-# --- CREATE (Limpa o cache para atualizar a lista) ---
+def limpar_cache():
+    # Usado pelo botão "Atualizar": força nova leitura das planilhas
+    get_repo().limpar_cache()
+
+# --- CREATE ---
 def add_obra(titulo, subtitulo, autor, edicao, local, editora, ano, 
              paginas, volume, folhas, serie, notas, is_online, url, data_acesso, tipo):
-    sh = get_connection()
-    if not sh: return
-    wk = sh.worksheet("obras")
-    new_id = get_next_id(wk)
-    
-    row = [new_id, titulo, subtitulo, autor, edicao, local, editora, ano, 
-           paginas, volume, folhas, serie, notas, is_online, url, data_acesso, tipo]
-    wk.append_row(row)
-    
-    # Limpa o cache para que a nova obra apareça imediatamente
-    st.cache_data.clear()
+    get_repo().add_obra(titulo, subtitulo, autor, edicao, local, editora, ano,
+                        paginas, volume, folhas, serie, notas, is_online, url, data_acesso, tipo)
 
 def add_ficha(obra_id, pagina, conceito, ideia_central, definicao, relacao, citacoes, tags):
-    sh = get_connection()
-    if not sh: return
-    wk = sh.worksheet("fichas")
-    new_id = get_next_id(wk)
-    
-    row = [new_id, obra_id, pagina, conceito, ideia_central, definicao, relacao, citacoes, tags]
-    wk.append_row(row)
-    
-    # Limpa o cache para atualizar a tabela
-    st.cache_data.clear()
-
-# --- READ (Cache Data = Guarda os dados na memória) ---
-
-# TTL=300 significa: Guarda por 5 minutos.
-@st.cache_data(ttl=300)
+    get_repo().add_ficha(obra_id, pagina, conceito, ideia_central, definicao, relacao, citacoes, tags)
+
+def importar_obras(registros):
+    return get_repo().importar_obras(registros)
+
+# --- UPDATE ---
+def get_versao(nome, registro_id):
+    return get_repo().get_versao(nome, registro_id)
+
+def update_obra(obra_id, novos_dados, versao=None):
+    return get_repo().update_obra(obra_id, novos_dados, versao)
+
+def update_ficha(ficha_id, novos_dados, versao=None):
+    return get_repo().update_ficha(ficha_id, novos_dados, versao)
+
+# --- READ ---
 def get_obras():
-    sh = get_connection()
-    if not sh: return []
-    wk = sh.worksheet("obras")
-    data = wk.get_all_records()
-    return [(d['id'], d['titulo'], d['subtitulo'], d['autor'], d['ano']) for d in data]
+    return get_repo().get_obras()
 
-@st.cache_data(ttl=300)
 def get_todas_obras_detalhadas(termo=""):
-    sh = get_connection()
-    if not sh: return []
-    wk = sh.worksheet("obras")
-    data = wk.get_all_records()
-    df = pd.DataFrame(data)
-    
-    if df.empty: return []
-    
-    df = df.astype(str) # Evita erros de tipos misturados
-    
-    if termo:
-        mask = df.apply(lambda x: x.str.contains(termo, case=False)).any(axis=1)
-        df = df[mask]
-        
-    cols_order = ['id', 'titulo', 'subtitulo', 'autor', 'ano', 'local', 'editora', 
-                  'paginas', 'volume', 'folhas', 'serie', 'notas', 'edicao', 
-                  'is_online', 'url', 'data_acesso', 'tipo']
-    
-    for c in cols_order:
-        if c not in df.columns: df[c] = ""
-            
-    return df[cols_order].values.tolist()
-
-@st.cache_data(ttl=300)
+    return get_repo().get_todas_obras_detalhadas(termo)
+
 def get_fichas_completas():
-    sh = get_connection()
-    if not sh: return []
-    
-    try:
-        data_fichas = sh.worksheet("fichas").get_all_records()
-        data_obras = sh.worksheet("obras").get_all_records()
-    except:
-        return []
-
-    df_fichas = pd.DataFrame(data_fichas)
-    df_obras = pd.DataFrame(data_obras)
-    
-    if df_fichas.empty: return []
-    if df_obras.empty: return []
-
-    df_fichas['obra_id'] = df_fichas['obra_id'].astype(str)
-    df_obras['id'] = df_obras['id'].astype(str)
-
-    df_obras = df_obras.rename(columns={'id': 'obra_id_ref'})
-    
-    full_df = pd.merge(df_fichas, df_obras, left_on='obra_id', right_on='obra_id_ref', how='inner')
-    
-    lista_final = []
-    for _, row in full_df.iterrows():
-        ficha_part = [
-            row.get('id', ''), row.get('obra_id', ''), row.get('pagina', ''), row.get('conceito', ''),
-            row.get('ideia_central', ''), row.get('definicao_conceito', ''), row.get('relacao_biblio', ''),
-            row.get('citacoes', ''), row.get('tags', ''), None, None
-        ]
-        obra_part = [
-            row.get('obra_id_ref', ''), row.get('titulo', ''), row.get('subtitulo', ''), row.get('autor', ''),
-            row.get('ano', ''), row.get('local', ''), row.get('editora', ''), row.get('paginas', ''),
-            row.get('volume', ''), row.get('folhas', ''), row.get('serie', ''), row.get('notas', ''),
-            row.get('edicao', ''), row.get('is_online', ''), row.get('url', ''), row.get('data_acesso', ''),
-            row.get('tipo', '')
-        ]
-        lista_final.append(ficha_part + obra_part)
-        
-    return lista_final
+    return get_repo().get_fichas_completas()
 
 def search_fichas(termo):
-    todos = get_fichas_completas()
-    resultado = []
-    t = str(termo).lower()
-    for item in todos:
-        texto = f"{item[3]} {item[7]} {item[8]} {item[12]}".lower()
-        if t in texto:
-            resultado.append(item)
-    return resultado
-
-# --- DELETE (Limpa o cache) ---
+    return get_repo().search_fichas(termo)
+
+# --- REFERÊNCIAS ABNT ({id da obra: referência}, memorizado por versão dos dados) ---
+def get_referencias():
+    return referencias.mapa_referencias(get_repo())
+
+# --- EXPORT (gerado sob demanda e memorizado por versão dos dados) ---
+def exportar(aba, formato, termo=""):
+    return exportacao.exportar_bytes(get_repo(), aba, formato, termo)
+
+def export_pronto(aba, formato, termo=""):
+    return exportacao.export_pronto(get_repo(), aba, formato, termo)
+
+# --- DELETE ---
 def delete_ficha(ficha_id):
-    sh = get_connection()
-    if not sh: return
-    wk = sh.worksheet("fichas")
-    try:
-        cell = wk.find(str(ficha_id), in_column=1)
-        if cell: 
-            wk.delete_rows(cell.row)
-            st.cache_data.clear() # Limpa cache para atualizar
-    except: pass
+    get_repo().delete_ficha(ficha_id)
 
-# --- SETUP INICIAL (A CORREÇÃO ESTÁ AQUI) ---
+# --- SETUP INICIAL ---
+@st.cache_resource
 def init_db():
-    sh = get_connection()
-    if not sh: return
-
-    # Pega lista de nomes de abas existentes para evitar o erro "Already Exists"
-    existing_worksheets = [ws.title for ws in sh.worksheets()]
-
-    # 1. Configurar ABA OBRAS
-    if "obras" not in existing_worksheets:
-        try:
-            wk_o = sh.add_worksheet("obras", 1000, 20)
-            wk_o.append_row(['id', 'titulo', 'subtitulo', 'autor', 'edicao', 'local', 'editora', 'ano', 
-                             'paginas', 'volume', 'folhas', 'serie', 'notas', 'is_online', 'url', 'data_acesso', 'tipo'])
-        except: pass # Se der erro (ex: criou em paralelo), ignora
-    else:
-        # Se já existe, só garante que tem cabeçalho (opcional)
-        pass
-
-    # 2. Configurar ABA FICHAS
-    if "fichas" not in existing_worksheets:
-        try:
-            wk_f = sh.add_worksheet("fichas", 1000, 20)
-            wk_f.append_row(['id', 'obra_id', 'pagina', 'conceito', 'ideia_central', 'definicao_conceito', 
-                             'relacao_biblio', 'citacoes', 'tags'])
-        except: pass
+    # Uma vez por processo (não a cada rerun); abas das partições: python fichamento.py sync
+    get_repo().init_db()
@@ -0,0 +1,131 @@
+import csv
+import itertools
+from io import BytesIO, StringIO
+
+from referencias import mapa_referencias, tipo_obra
+
+# Motor de exportação (sem Streamlit): cada formato é um gerador de texto escrito em blocos.
+# Os bytes prontos ficam no memo do Repositorio, por formato + filtro + versão dos dados.
+
+FORMATOS = {'csv': "Tabela (CSV)", 'txt': "Referências ABNT (TXT)", 'bib': "BibTeX (.bib)", 'ris': "RIS (.ris)"}
+MIMES = {'csv': 'text/csv', 'txt': 'text/plain', 'bib': 'application/x-bibtex', 'ris': 'application/x-research-info-systems'}
+NOMES = {('fichas', 'csv'): 'fichas_completo.csv', ('fichas', 'txt'): 'referencias.txt', ('obras', 'csv'): 'bibliografia.csv'}
+COLS_OBRAS_EXPORT = ['id', 'titulo', 'subtitulo', 'autor', 'ano', 'local', 'editora', 'paginas', 'volume', 'folhas',
+                     'serie', 'notas', 'edicao', 'is_online', 'url', 'data_acesso', 'tipo']
+TAMANHO_BLOCO = 500  # registros por escrita
+BOM = '\ufeff'.encode('utf-8')  # CSV em utf-8-sig para o Excel
+
+def nome_arquivo(aba, formato):
+    return NOMES.get((aba, formato), f"{aba}.{formato}")
+
+# --- FONTES ---
+def _registros(repo, aba, termo):
+    if aba == "fichas": return repo.search_fichas(termo) if termo else repo.get_fichas_completas()
+    return repo.get_todas_obras_detalhadas(termo)
+
+def _obras(registros, aba):
+    # BibTeX/RIS listam cada obra uma vez; nas fichas a obra ocupa f[11:28] (mesma ordem de COLS_OBRAS_EXPORT)
+    if aba == "obras":
+        yield from registros
+        return
+    vistas = set()
+    for f in registros:
+        if str(f[11]) not in vistas:
+            vistas.add(str(f[11]))
+            yield f[11:28]
+
+# --- GERADORES POR FORMATO ---
+def _linhas_csv(linhas):
+    buf = StringIO()
+    w = csv.writer(buf, lineterminator='\n')
+    for linha in linhas:
+        w.writerow(linha)
+        yield buf.getvalue()
+        buf.seek(0); buf.truncate()
+
+def _ref(refs, registro, aba):
+    # Referência já formatada da obra do registro (ficha: f[11] = id da obra)
+    return refs.get(str(registro[11] if aba == "fichas" else registro[0]), "").replace('**','')
+
+def gerar_csv(registros, aba, refs):
+    if aba == "fichas":
+        cab = ['ID', 'Obra', 'Conceito', 'Ideia', 'Definição', 'Citação', 'Ref ABNT']
+        linhas = ([f[0], f[12], f[3], f[4], f[5], f[7], _ref(refs, f, aba)] for f in registros)
+    else:
+        cab, linhas = COLS_OBRAS_EXPORT, registros
+    yield from _linhas_csv(itertools.chain([cab], linhas))
+
+def gerar_txt(registros, aba, refs):
+    for r in registros:
+        yield _ref(refs, r, aba) + "\n\n"
+
+def _tipo(o):
+    return tipo_obra(o[16])
+
+def _bib(valor):
+    return str(valor).replace('{', '').replace('}', '')
+
+def gerar_bib(registros, aba, refs=None):
+    for o in _obras(registros, aba):
+        tipo = _tipo(o)
+        campos = [('title', f"{o[1]}: {o[2]}" if o[2] else o[1]), ('author', str(o[3]).replace('; ', ' and ')), ('year', o[4])]
+        if tipo == "artigo":
+            entrada = "article"
+            campos += [('journal', o[6]), ('address', o[5]), ('volume', o[8]), ('number', o[9]), ('pages', o[7])]
+        elif tipo in ("tese", "dissertacao"):
+            entrada = "phdthesis" if tipo == "tese" else "mastersthesis"
+            campos += [('school', o[6]), ('address', o[5])]
+        else:
+            entrada = "book"
+            campos += [('publisher', o[6]), ('address', o[5]), ('edition', o[12]), ('volume', o[8]), ('series', o[10])]
+        if str(o[13]) == "1": campos += [('url', o[14]), ('urldate', o[15])]
+        campos += [('note', o[11])]
+        corpo = ",\n".join(f"  {k} = {{{_bib(v)}}}" for k, v in campos if str(v).strip())
+        yield f"@{entrada}{{obra{o[0]},\n{corpo}\n}}\n\n"
+
+def gerar_ris(registros, aba, refs=None):
+    tipos = {"artigo": "JOUR", "tese": "THES", "dissertacao": "THES", "livro": "BOOK"}
+    for o in _obras(registros, aba):
+        tipo = _tipo(o)
+        tags = [('TY', tipos[tipo])]
+        tags += [('AU', a.strip()) for a in str(o[3]).split(';') if a.strip()]
+        tags += [('TI', f"{o[1]}: {o[2]}" if o[2] else o[1]), ('PY', o[4]), ('CY', o[5])]
+        if tipo == "artigo":
+            inicio, _, fim = str(o[7]).partition('-')
+            tags += [('T2', o[6]), ('VL', o[8]), ('IS', o[9]), ('SP', inicio), ('EP', fim)]
+        else:
+            tags += [('PB', o[6]), ('ET', o[12]), ('VL', o[8])]
+        if str(o[13]) == "1": tags += [('UR', o[14]), ('Y2', o[15])]
+        tags += [('N1', o[11])]
+        yield "".join(f"{k}  - {v}\n" for k, v in tags if str(v).strip()) + "ER  - \n\n"
+
+GERADORES = {'csv': gerar_csv, 'txt': gerar_txt, 'bib': gerar_bib, 'ris': gerar_ris}
+
+# --- ESCRITA EM BLOCOS ---
+def escrever(pedacos, destino, tamanho_bloco=TAMANHO_BLOCO):
+    # destino = arquivo binário; junta até tamanho_bloco pedaços por write()
+    bloco = []
+    for pedaco in pedacos:
+        bloco.append(pedaco)
+        if len(bloco) >= tamanho_bloco:
+            destino.write("".join(bloco).encode('utf-8')); bloco = []
+    if bloco: destino.write("".join(bloco).encode('utf-8'))
+
+def _gerar_bytes(repo, aba, formato, termo):
+    destino = BytesIO()
+    if formato == 'csv': destino.write(BOM)
+    escrever(GERADORES[formato](_registros(repo, aba, termo), aba, mapa_referencias(repo)), destino)
+    return destino.getvalue()
+
+def exportar_bytes(repo, aba, formato, termo=""):
+    # Gerado só quando pedido; repetições na mesma versão dos dados saem do memo
+    return repo.memo(('export', aba, formato, termo), lambda: _gerar_bytes(repo, aba, formato, termo))
+
+def export_pronto(repo, aba, formato, termo=""):
+    return repo.em_memo(('export', aba, formato, termo))
+
+def exportar_arquivo(repo, aba, formato, caminho, termo=""):
+    # Para o CLI: escreve direto no arquivo, sem manter o conteúdo em memória
+    with open(caminho, 'wb') as fp:
+        if formato == 'csv': fp.write(BOM)
+        escrever(GERADORES[formato](_registros(repo, aba, termo), aba, mapa_referencias(repo)), fp)
@@ -0,0 +1,100 @@
+import argparse
+import os
+import sys
+
+import core
+
+# Linha de comando sem Streamlit para tarefas em lote (importação, exportação, backup, manutenção).
+# Uso: python fichamento.py [--credenciais ARQ] [--planilha NOME] [--particoes JSON] {import,export,sync,reindex,rebalance} ...
+
+def _repo(args):
+    creds = core.carregar_credenciais(args.credenciais)
+    return core.Repositorio(core.conectar(creds, args.planilha), particionamento=core.carregar_particoes(args.particoes))
+
+def _ler_fichas_csv(conteudo):
+    import pandas as pd
+    from io import BytesIO
+    try: df = pd.read_csv(BytesIO(conteudo), sep=None, engine='python', dtype=str)
+    except: df = pd.read_csv(BytesIO(conteudo), sep=';', encoding='utf-8-sig', dtype=str)
+    df.columns = [core.normalizar_coluna(c) for c in df.columns]
+    return df.fillna('').to_dict('records')
+
+# --- COMANDOS ---
+def cmd_import(args):
+    repo = _repo(args)
+    registros = []
+    for caminho in args.arquivos:
+        with open(caminho, 'rb') as fp:
+            conteudo = fp.read()
+        if args.tipo == "fichas": registros += _ler_fichas_csv(conteudo)
+        else: registros += core.ler_referencias(caminho.lower(), conteudo)
+    total = repo.importar_fichas(registros) if args.tipo == "fichas" else repo.importar_obras(registros)
+    print(f"{total} {args.tipo} importadas.")
+
+def cmd_export(args):
+    repo = _repo(args)
+    if args.formato:
+        # Formatos do motor de exportação: escrita em blocos direto no arquivo
+        import exportacao
+        saida = args.saida or exportacao.nome_arquivo(args.aba, args.formato)
+        exportacao.exportar_arquivo(repo, args.aba, args.formato, saida, args.busca)
+        print(f"'{args.aba}' exportado em {args.formato} para {saida}.")
+        return
+    df = repo.get_frame(args.aba)
+    if not args.saida:
+        df.to_csv(sys.stdout, index=False); return
+    df.to_csv(args.saida, index=False, encoding='utf-8-sig')
+    print(f"{len(df)} linhas de '{args.aba}' exportadas para {args.saida}.")
+
+def cmd_sync(args):
+    for nome, total in _repo(args).sincronizar().items():
+        print(f"{nome}: {total} linhas com versão.")
+
+def cmd_reindex(args):
+    repo = _repo(args)
+    for nome in args.abas or list(core.COLS_PLANILHA):
+        print(f"{nome}: {repo.reindexar(nome)} IDs corrigidos.")
+
+def cmd_rebalance(args):
+    for aba, total in _repo(args).rebalancear().items():
+        print(f"{aba}: {total} fichas recebidas.")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="fichamento", description="Sistema de Fichamento em lote (sem interface).")
+    parser.add_argument("--credenciais", help=f"JSON/TOML da conta de serviço (padrão: ${core.ENV_CREDENCIAIS} ou {core.SECRETS_STREAMLIT})")
+    parser.add_argument("--planilha", default=os.environ.get(core.ENV_PLANILHA, core.NOME_PLANILHA), help="Nome da planilha no Google Sheets")
+    parser.add_argument("--particoes", help=f"JSON (ou arquivo .json) com as partições das fichas (padrão: ${core.ENV_PARTICOES})")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("import", help="Importa arquivos .csv/.ris/.bib (obras) ou .csv (fichas) em uma única escrita")
+    p.add_argument("arquivos", nargs="+")
+    p.add_argument("--tipo", choices=list(core.COLS_PLANILHA), default="obras")
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser("export", help="Exporta uma aba completa em CSV (backup) ou em csv/txt/bib/ris")
+    p.add_argument("aba", choices=list(core.COLS_PLANILHA))
+    p.add_argument("-o", "--saida", help="Arquivo de saída (padrão: stdout no backup, nome padrão nos formatos)")
+    p.add_argument("--formato", choices=["csv", "txt", "bib", "ris"], help="Formato de exportação (sem isso: backup bruto da aba)")
+    p.add_argument("--busca", default="", help="Filtra os registros exportados")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("sync", help="Cria abas ausentes e preenche a coluna de versão")
+    p.set_defaults(func=cmd_sync)
+
+    p = sub.add_parser("reindex", help="Corrige IDs vazios ou duplicados")
+    p.add_argument("--aba", dest="abas", action="append", choices=list(core.COLS_PLANILHA), help="Aba a corrigir (padrão: todas)")
+    p.set_defaults(func=cmd_reindex)
+
+    p = sub.add_parser("rebalance", help="Move as fichas para a partição correta (após mudar as faixas; rode com o app parado)")
+    p.set_defaults(func=cmd_rebalance)
+
+    args = parser.parse_args(argv)
+    try:
+        args.func(args)
+    except Exception as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+# Formatação de referências ABNT (sem Streamlit; usada pelo app e pela exportação).
+# Formata a coluna inteira de obras de uma vez (operações vetorizadas do pandas) e guarda
+# o resultado por ID da obra no memo do Repositorio, ou seja, por versão dos dados.
+
+CAMPOS = ['id', 'titulo', 'subtitulo', 'autor', 'edicao', 'local', 'editora', 'ano',
+          'paginas', 'volume', 'folhas', 'is_online', 'url', 'data_acesso', 'tipo']
+
+# Tipo da obra pelo campo 'tipo' (sem diferenciar maiúsculas): o primeiro trecho encontrado vale; senão 'livro'.
+# Mesma regra na referência ABNT e na exportação BibTeX/RIS.
+TIPOS = [('dissertacao', 'disserta'), ('tese', 'tese'), ('artigo', 'artigo')]
+
+def tipo_obra(tipo):
+    t = str(tipo).lower()
+    return next((nome for nome, trecho in TIPOS if trecho in t), 'livro')
+
+def _prefixo(s, antes, depois=""):
+    # "antes + valor + depois" só onde o valor não está vazio
+    return (antes + s + depois).where(s != "", "")
+
+def formatar_referencias(df):
+    # df = frame da aba 'obras'; retorna uma Series (mesmo índice) com as referências em markdown (**negrito**)
+    import pandas as pd
+    c = {k: (df[k] if k in df.columns else pd.Series("", index=df.index)).fillna("").astype(str).str.strip() for k in CAMPOS}
+    tipo = c['tipo'].map({t: tipo_obra(t) for t in c['tipo'].unique()})  # classifica cada tipo distinto uma vez
+    artigo = tipo == 'artigo'
+    tese = tipo == 'tese'
+    dissertacao = tipo == 'dissertacao'
+
+    autor = c['autor'].str.rstrip(".") + ". "  # evita "SILVA, J.." quando o nome termina em abreviação
+    subtitulo = _prefixo(c['subtitulo'], ": ")
+
+    # Livro / Monografia: AUTOR. **Título**: subtítulo. Edição Local: Editora, ano.
+    livro = (autor + "**" + c['titulo'] + "**" + subtitulo + ". " + _prefixo(c['edicao'], "", " ")
+             + c['local'] + ": " + c['editora'] + ", " + c['ano'] + ".")
+
+    # Artigo: AUTOR. Título: subtítulo. **Revista**, Local, v. X, n. Y, p. Z, ano.
+    # (no cadastro de artigos o campo 'folhas' guarda o número do fascículo)
+    detalhes = _prefixo(c['volume'], "v. ", ", ") + _prefixo(c['folhas'], "n. ", ", ") + _prefixo(c['paginas'], "p. ", ", ")
+    ref_artigo = (autor + c['titulo'] + subtitulo + ". **" + c['editora'] + "**, "
+                  + _prefixo(c['local'], "", ", ") + detalhes + c['ano'] + ".")
+
+    # Tese/Dissertação: AUTOR. **Título**: subtítulo. Ano. N f. Tese (Doutorado) – Instituição, Local, ano.
+    grau = pd.Series("Tese (Doutorado)", index=df.index).where(~dissertacao, "Dissertação (Mestrado)")
+    ref_tese = (autor + "**" + c['titulo'] + "**" + subtitulo + ". " + c['ano'] + ". "
+                + _prefixo(c['folhas'], "", " f. ") + grau + " – " + c['editora'] + ", "
+                + _prefixo(c['local'], "", ", ") + c['ano'] + ".")
+
+    ref = livro.where(~artigo, ref_artigo).where(~(tese | dissertacao), ref_tese)
+
+    # Documentos online: Disponível em: URL. Acesso em: data.
+    online = c['is_online'].isin(["1", "1.0", "True", "Sim"])
+    ref = (ref + _prefixo(c['url'], " Disponível em: ", ".").where(online, "")
+           + _prefixo(c['data_acesso'], " Acesso em: ", ".").where(online, ""))
+    return ref
+
+def mapa_referencias(repo):
+    # { id da obra (str): referência }, calculado uma vez por versão dos dados
+    def calcular():
+        df = repo.get_frame("obras")
+        if df.empty: return {}
+        return dict(zip(df['id'].astype(str), formatar_referencias(df)))
+    return repo.memo(('referencias',), calcular)
@@ -1,9 +1,8 @@
 import streamlit as st
 import database as db
+import core
+import exportacao
 import pandas as pd
-from io import StringIO
-import unicodedata
-import re
 from fpdf import FPDF
 
 # ========================================================
@@ -35,10 +34,12 @@ with c_title:
 with c_refresh:
     # Botão vital para limpar o cache de 5 minutos se o utilizador quiser ver dados novos agora
     if st.button("🔄 Atualizar"):
-        st.cache_data.clear()
+        db.limpar_cache()
         st.rerun()
 
 if 'dados_preview' not in st.session_state: st.session_state.dados_preview = None
+# (id, versão carregada) da ficha em edição
+if 'editando' not in st.session_state: st.session_state.editando = None
 
 menu = st.sidebar.selectbox("Menu", ["Cadastrar Obra", "Importar", "Fazer Fichamento", "Visualizar Dados"])
 
@@ -94,51 +95,15 @@ def criar_pdf_fichamento(f, ref_abnt):
             
     return pdf.output(dest='S').encode('latin-1')
 
-# --- HELPERS DE TEXTO ---
-def normalizar_coluna(t): 
-    return ''.join(c for c in unicodedata.normalize('NFD', str(t)) if unicodedata.category(c) != 'Mn').lower().strip()
-
-def formatar_referencia_abnt_obra(f):
-    # Indices OBRAS: 0:id, 1:tit, 2:sub, 3:aut, 4:ano, 5:loc, 6:edit, 7:pag, 8:vol, 9:fol, 10:ser, 11:not, 12:ed, 13:on, 14:url, 15:dat, 16:typ
-    titulo = f[1]
-    subtitulo = f": {f[2]}" if f[2] else ""
-    autor = f[3]
-    ano = f[4]
-    local = f[5]
-    editora = f[6]
-    edicao = f"{f[12]} " if f[12] else ""
-    tipo = f[16]
-    
-    detalhes = ""
-    if f[8]: detalhes += f"v. {f[8]}, "
-    
-    if tipo and "Artigo" in tipo:
-        ref = f"{autor}. {titulo}{subtitulo}. **{editora}**, {local}, {detalhes}{ano}."
-    else:
-        ref = f"{autor}. **{titulo}**{subtitulo}. {edicao}{local}: {editora}, {ano}."
-    
-    if str(f[13]) == "1": ref += f" Disponível em: {f[14]}."
-    return ref
-
-def formatar_referencia_abnt_ficha(f):
-    # f[0-10] ficha, f[11-27] obra (Joined Data)
-    titulo = f[12]
-    subtitulo = f": {f[13]}" if f[13] else ""
-    autor = f[14]
-    ano = f[15]
-    local = f[16]
-    editora = f[17]
-    edicao = f"{f[23]} " if f[23] else ""
-    tipo = f[27]
-    
-    detalhes = ""
-    if f[19]: detalhes += f"v. {f[19]}, "
-    
-    if tipo and "Artigo" in tipo:
-        ref = f"{autor}. {titulo}{subtitulo}. **{editora}**, {local}, {detalhes}{ano}."
-    else:
-        ref = f"{autor}. **{titulo}**{subtitulo}. {edicao}{local}: {editora}, {ano}."
-    return ref
+# --- PAINEL DE EXPORTAÇÃO (CSV, TXT ABNT, BibTeX, RIS) ---
+def painel_exportacao(aba, termo):
+    c_fmt, c_gerar, c_baixar = st.columns([0.5, 0.25, 0.25])
+    fmt = c_fmt.selectbox("Exportar como", list(exportacao.FORMATOS), format_func=exportacao.FORMATOS.get, key=f"fmt_{aba}")
+    # Só gera ao clicar; se já foi gerado para estes dados, o botão de download aparece direto
+    if c_gerar.button("⚙️ Gerar arquivo", key=f"gerar_{aba}") or db.export_pronto(aba, fmt, termo):
+        with st.spinner("Gerando arquivo..."):
+            dados = db.exportar(aba, fmt, termo)
+        c_baixar.download_button("⬇️ Baixar", dados, exportacao.nome_arquivo(aba, fmt), mime=exportacao.MIMES[fmt], key=f"baixar_{aba}")
 
 # ========================================================
 # 1. CADASTRAR OBRA
@@ -190,28 +155,7 @@ elif menu == "Importar":
     
     if arq and st.session_state.dados_preview is None:
         try:
-            res = []
-            # CSV
-            if arq.name.endswith('.csv'):
-                try: df = pd.read_csv(arq, sep=None, engine='python')
-                except: arq.seek(0); df = pd.read_csv(arq, sep=';', encoding='utf-8-sig')
-                df.columns = [normalizar_coluna(c) for c in df.columns]
-                if 'titulo' in df.columns:
-                    for _, r in df.iterrows():
-                        res.append({'titulo': str(r.get('titulo','')), 'subtitulo': str(r.get('subtitulo','')), 'autor': str(r.get('autor','')), 'ano': int(re.search(r'\d{4}', str(r.get('ano',0))).group()) if re.search(r'\d{4}', str(r.get('ano',0))) else 0, 'local': str(r.get('local','S.l.')), 'editora': str(r.get('editora','S.n.')), 'edicao': str(r.get('edicao','')), 'tipo': str(r.get('tipo','Livro')), 'url': str(r.get('url','')), 'paginas': str(r.get('paginas',''))})
-            
-            # RIS (Lazy Import)
-            elif arq.name.endswith('.ris'):
-                import rispy
-                for e in rispy.load(StringIO(arq.getvalue().decode("utf-8"))):
-                    res.append({'titulo':e.get('primary_title',''), 'subtitulo':'', 'autor':"; ".join(e.get('authors',[])), 'ano':int(e.get('year',0)) if e.get('year') else 0, 'local':e.get('place_published','S.l.'), 'editora':e.get('publisher','S.n.'), 'edicao':'', 'tipo':'Artigo' if e.get('type_of_reference')=='JOUR' else 'Livro', 'url':e.get('url',''), 'paginas':''})
-            
-            # BIB (Lazy Import)
-            elif arq.name.endswith('.bib'):
-                import bibtexparser
-                for e in bibtexparser.loads(arq.getvalue().decode("utf-8")).entries:
-                    res.append({'titulo':e.get('title','').replace('{','').replace('}',''), 'subtitulo':'', 'autor':e.get('author','').replace('{','').replace('}',''), 'ano':int(e.get('year',0)) if e.get('year') else 0, 'local':e.get('address','S.l.').replace('{','').replace('}',''), 'editora':e.get('publisher','S.n.').replace('{','').replace('}',''), 'edicao':'', 'tipo':'Livro', 'url':'', 'paginas':''})
-            
+            res = core.ler_referencias(arq.name, arq.getvalue())
             if res: st.session_state.dados_preview = res; st.rerun()
         except Exception as e: st.error(f"Erro ao ler arquivo: {e}")
 
@@ -221,11 +165,7 @@ elif menu == "Importar":
         if c1.button("❌ Cancelar"): st.session_state.dados_preview = None; st.rerun()
         if c2.button("✅ Confirmar Importação"):
             with st.spinner("Salvando em Lote no Google Sheets..."):
-                c=0
-                for i in st.session_state.dados_preview:
-                    on = 1 if len(i['url'])>5 else 0
-                    db.add_obra(i['titulo'], i['subtitulo'], i['autor'], i['edicao'], i['local'], i['editora'], i['ano'], i['paginas'], "", "", "", "Importado", on, i['url'], "", i['tipo'])
-                    c+=1
+                c = db.importar_obras(st.session_state.dados_preview)
             st.success(f"{c} obras salvas!"); st.session_state.dados_preview = None
 
 # ========================================================
@@ -259,9 +199,11 @@ elif menu == "Fazer Fichamento":
         tg = st.text_input("Tags (separadas por vírgula)")
         
         if st.button("Salvar Ficha"):
-            with st.spinner("Salvando ficha..."):
-                db.add_ficha(oid, pag, conc, ic, df_txt, rl, ct, tg)
-            st.success("Ficha salva!")
+            try:
+                with st.spinner("Salvando ficha..."):
+                    db.add_ficha(oid, pag, conc, ic, df_txt, rl, ct, tg)
+                st.success("Ficha salva!")
+            except db.AbaAusente as e: st.error(str(e))
 
 # ========================================================
 # 4. VISUALIZAR E DOWNLOADS
@@ -274,33 +216,24 @@ elif menu == "Visualizar Dados":
     # --- MODO FICHAMENTOS ---
     if "Fichamentos" in modo:
         # Busca com Cache
-        fichas = db.search_fichas(termo) if termo else db.get_fichas_completas()
+        try: fichas = db.search_fichas(termo) if termo else db.get_fichas_completas()
+        except db.AbaAusente as e:
+            # Partição configurada sem aba: avisa qual falta em vez de mostrar "nenhuma ficha"
+            st.error(str(e)); st.stop()
         
         if fichas:
-            # Preparar CSV Geral
-            lista_export = []
-            txt_ref = ""
-            for f in fichas:
-                ref = formatar_referencia_abnt_ficha(f)
-                lista_export.append({
-                    'ID': f[0], 'Obra': f[12], 'Conceito': f[3], 'Ideia': f[4], 
-                    'Definição': f[5], 'Citação': f[7], 'Ref ABNT': ref.replace('**','')
-                })
-                txt_ref += ref.replace('**','') + "\n\n"
-            
-            # Botões de Download em Massa
-            c_csv, c_txt = st.columns(2)
-            c_csv.download_button("📊 Baixar Tabela Completa (CSV)", pd.DataFrame(lista_export).to_csv(index=False).encode('utf-8-sig'), 'fichas_completo.csv')
-            c_txt.download_button("📜 Baixar Referências (TXT)", txt_ref, 'referencias.txt')
+            # Downloads em massa: arquivo gerado só quando pedido
+            painel_exportacao("fichas", termo)
             
             st.markdown("---")
             st.write(f"**Total:** {len(fichas)} fichas encontradas.")
             
-            # Listagem Individual
+            # Listagem Individual (referências formatadas uma vez por obra)
+            refs = db.get_referencias()
             for f in fichas:
                 # Layout: Dados (85%) | Ações (15%)
                 c_data, c_act = st.columns([0.85, 0.15])
-                ref_vis = formatar_referencia_abnt_ficha(f)
+                ref_vis = refs.get(str(f[1]), "")
                 
                 with c_data:
                     with st.expander(f"📄 {f[3]} | {f[12]}"):
@@ -309,6 +242,37 @@ elif menu == "Visualizar Dados":
                         if f[5]: st.write(f"**Definição:** {f[5]}")
                         st.info(f"**Citação:** \"{f[7]}\"")
                         st.caption(f"Tags: {f[8]}")
+                    
+                    # Formulário de edição (envia só os campos alterados)
+                    if st.session_state.editando and str(st.session_state.editando[0]) == str(f[0]):
+                        with st.form(key=f"form_edit_{f[0]}"):
+                            e_pag = st.text_input("Página da Citação", value=str(f[2]))
+                            e_conc = st.text_input("Conceito Chave", value=str(f[3]))
+                            e_ic = st.text_area("1. Ideia Central", value=str(f[4]))
+                            e_df = st.text_area("2. Definição do Conceito", value=str(f[5]))
+                            e_rl = st.text_area("3. Relação Bibliográfica", value=str(f[6]))
+                            e_ct = st.text_area("4. Citação Direta", value=str(f[7]))
+                            e_tg = st.text_input("Tags (separadas por vírgula)", value=str(f[8]))
+                            c_salvar, c_cancelar = st.columns(2)
+                            salvar = c_salvar.form_submit_button("💾 Salvar Alterações")
+                            cancelar = c_cancelar.form_submit_button("Cancelar")
+                        if cancelar:
+                            st.session_state.editando = None; st.rerun()
+                        if salvar:
+                            novos = {'pagina': e_pag, 'conceito': e_conc, 'ideia_central': e_ic, 'definicao_conceito': e_df,
+                                     'relacao_biblio': e_rl, 'citacoes': e_ct, 'tags': e_tg}
+                            try:
+                                with st.spinner("Salvando alterações..."):
+                                    salvo = db.update_ficha(f[0], novos, versao=st.session_state.editando[1])
+                                if salvo:
+                                    st.session_state.editando = None; st.rerun()
+                                # Ficha não encontrada (ex.: excluída em outra sessão): mantém o formulário aberto
+                                st.error("Não foi possível salvar: a ficha não foi encontrada na planilha. Copie suas alterações antes de sair.")
+                            except db.ConflitoDeEdicao:
+                                # Recarrega os dados e fecha o formulário para que a próxima edição use a versão atual
+                                db.limpar_cache()
+                                st.session_state.editando = None
+                                st.warning("Esta ficha foi alterada em outra sessão. Os dados foram recarregados; clique em ✏️ para editar novamente.")
                 
                 with c_act:
                     # Botão PDF
@@ -318,6 +282,11 @@ elif menu == "Visualizar Dados":
                     except Exception as e: 
                         st.error("Erro PDF")
                     
+                    # Botão Editar
+                    if st.button("✏️", key=f"edit_{f[0]}", help="Editar ficha"):
+                        st.session_state.editando = (f[0], db.get_versao("fichas", f[0]))
+                        st.rerun()
+                    
                     # Botão Excluir
                     if st.button("🗑️", key=f"del_{f[0]}", help="Excluir ficha"):
                         db.delete_ficha(f[0])
@@ -329,13 +298,12 @@ elif menu == "Visualizar Dados":
     else:
         obras = db.get_todas_obras_detalhadas(termo)
         if obras:
-            cols = ['id', 'titulo', 'subtitulo', 'autor', 'ano', 'local', 'editora', 'paginas', 'volume', 'folhas', 'serie', 'notas', 'edicao', 'is_online', 'url', 'data_acesso', 'tipo']
-            
-            st.download_button("📊 Baixar Bibliografia (CSV)", pd.DataFrame(obras, columns=cols).to_csv(index=False).encode('utf-8-sig'), 'bibliografia.csv')
+            painel_exportacao("obras", termo)
             
             st.markdown("---")
+            refs = db.get_referencias()
             for item in obras:
-                ref = formatar_referencia_abnt_obra(item)
+                ref = refs.get(str(item[0]), "")
                 st.markdown(f"**{item[1]}**: {ref}")
         else:
             st.info("Nenhuma obra encontrada.")
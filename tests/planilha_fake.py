@@ -0,0 +1,80 @@
+import gspread
+from gspread.utils import a1_to_rowcol
+
+# Planilha em memória com a parte da API do gspread usada pelo Repositorio (valores sempre como texto)
+
+class Celula:
+    def __init__(self, row, col, value):
+        self.row, self.col, self.value = row, col, value
+
+class Aba:
+    def __init__(self, title, linhas):
+        self.title = title
+        self.linhas = [[str(v) for v in l] for l in linhas]
+        self.escritas = []  # listas de updates recebidas por batch_update
+
+    def get_all_records(self):
+        cab = self.linhas[0]
+        return [dict(zip(cab, l + [''] * (len(cab) - len(l)))) for l in self.linhas[1:]]
+
+    def get_all_values(self):
+        return [list(l) for l in self.linhas]
+
+    def row_values(self, linha):
+        return list(self.linhas[linha - 1]) if linha <= len(self.linhas) else []
+
+    def col_values(self, col):
+        return [l[col - 1] if len(l) >= col else '' for l in self.linhas]
+
+    def batch_get(self, ranges):
+        # Linhas inteiras ("5:5") ou faixas da coluna A ("A2:A4")
+        res = []
+        for r in ranges:
+            ini, fim = r.split(':')
+            if ini.isdigit():
+                res.append([self.row_values(i) for i in range(int(ini), int(fim) + 1) if i <= len(self.linhas)])
+            else:
+                ini, fim = int(ini[1:]), int(fim[1:])
+                res.append([[self.linhas[i - 1][0]] for i in range(ini, fim + 1) if i <= len(self.linhas)])
+        return res
+
+    def batch_update(self, updates):
+        self.escritas.append(updates)
+        for u in updates:
+            linha, col = a1_to_rowcol(u['range'].split(':')[0])
+            for i, valores in enumerate(u['values']):
+                for j, v in enumerate(valores): self._gravar(linha + i, col + j, v)
+
+    def _gravar(self, linha, col, valor):
+        while len(self.linhas) < linha: self.linhas.append([])
+        l = self.linhas[linha - 1]
+        l.extend([''] * (col - len(l)))
+        l[col - 1] = str(valor)
+
+    def find(self, valor, in_column=1):
+        for i, l in enumerate(self.linhas):
+            if len(l) >= in_column and l[in_column - 1] == valor: return Celula(i + 1, in_column, valor)
+
+    def append_row(self, linha):
+        self.linhas.append([str(v) for v in linha])
+
+    def append_rows(self, linhas):
+        for l in linhas: self.append_row(l)
+
+    def delete_rows(self, inicio, fim=None):
+        del self.linhas[inicio - 1:(fim or inicio)]
+
+class Planilha:
+    def __init__(self, abas):
+        self.abas = {a.title: a for a in abas}
+
+    def worksheet(self, nome):
+        if nome not in self.abas: raise gspread.exceptions.WorksheetNotFound(nome)
+        return self.abas[nome]
+
+    def worksheets(self):
+        return list(self.abas.values())
+
+    def add_worksheet(self, nome, linhas, colunas):
+        self.abas[nome] = Aba(nome, [])
+        return self.abas[nome]
@@ -0,0 +1,52 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import exportacao
+
+# Obras na ordem de COLS_OBRAS_EXPORT (id, titulo, subtitulo, autor, ano, local, editora, paginas, volume,
+# folhas, serie, notas, edicao, is_online, url, data_acesso, tipo)
+LIVRO = ['1', 'Vigiar e punir', 'nascimento da prisão', 'FOUCAULT, M.', '1987', 'Petrópolis', 'Vozes',
+         '', '', '', '', '', '2. ed.', '0', '', '', 'Livro']
+ARTIGO = ['2', 'Um título', '', 'SILVA, J.; SOUZA, A.', '2020', 'São Paulo', 'Revista X',
+          '10-20', '3', '2', '', '', '', '1', 'http://x.org', '01 jan. 2021', 'Artigo de periódico']
+DISSERTACAO = ['3', 'Estudo', '', 'LIMA, P.', '2019', 'Recife', 'UFPE', '', '', '120', '', '', '', '0', '', '', 'dissertação']
+REFS = {'1': 'FOUCAULT, M. **Vigiar e punir**.', '2': 'SILVA, J. Um título.', '3': 'LIMA, P. **Estudo**.'}
+
+def _ficha(id_, obra):
+    return [id_, obra[0], '5', f'Conceito {id_}', 'Ideia', 'Def', 'Rel', 'Citação', 'tag', None, None] + obra
+
+def _texto(gerador, registros, aba):
+    return "".join(gerador(registros, aba, REFS))
+
+def test_csv_de_fichas_usa_a_referencia_sem_markdown():
+    linhas = _texto(exportacao.gerar_csv, [_ficha('7', LIVRO)], "fichas").splitlines()
+    assert linhas[0] == 'ID,Obra,Conceito,Ideia,Definição,Citação,Ref ABNT'
+    assert linhas[1] == '7,Vigiar e punir,Conceito 7,Ideia,Def,Citação,"FOUCAULT, M. Vigiar e punir."'
+
+def test_csv_de_obras_tem_o_cabecalho_de_exportacao():
+    linhas = _texto(exportacao.gerar_csv, [LIVRO], "obras").splitlines()
+    assert linhas[0].split(',') == exportacao.COLS_OBRAS_EXPORT and len(linhas) == 2
+
+def test_txt_lista_uma_referencia_por_registro():
+    assert _texto(exportacao.gerar_txt, [LIVRO, ARTIGO], "obras") == "FOUCAULT, M. Vigiar e punir.\n\nSILVA, J. Um título.\n\n"
+
+def test_bib_por_tipo():
+    bib = _texto(exportacao.gerar_bib, [LIVRO, ARTIGO, DISSERTACAO], "obras")
+    assert "@book{obra1,\n  title = {Vigiar e punir: nascimento da prisão}" in bib
+    assert "  publisher = {Vozes}" in bib and "  edition = {2. ed.}" in bib
+    assert "@article{obra2," in bib and "  author = {SILVA, J. and SOUZA, A.}" in bib
+    assert "  journal = {Revista X}" in bib and "  url = {http://x.org}" in bib
+    assert "@mastersthesis{obra3," in bib and "  school = {UFPE}" in bib
+
+def test_bib_de_fichas_lista_cada_obra_uma_vez():
+    bib = _texto(exportacao.gerar_bib, [_ficha('1', LIVRO), _ficha('2', LIVRO)], "fichas")
+    assert bib.count("@book{obra1,") == 1
+
+def test_ris_por_tipo():
+    entradas = _texto(exportacao.gerar_ris, [LIVRO, ARTIGO, DISSERTACAO], "obras").split("ER  - \n\n")
+    assert entradas[0].startswith("TY  - BOOK\nAU  - FOUCAULT, M.\n") and "PB  - Vozes\n" in entradas[0]
+    assert "TY  - JOUR\n" in entradas[1] and "AU  - SOUZA, A.\n" in entradas[1]
+    assert "SP  - 10\nEP  - 20\n" in entradas[1] and "UR  - http://x.org\n" in entradas[1]
+    assert entradas[2].startswith("TY  - THES\n") and "PB  - UFPE\n" in entradas[2]
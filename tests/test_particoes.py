@@ -0,0 +1,73 @@
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("pandas")
+pytest.importorskip("gspread")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import core
+from planilha_fake import Aba, Planilha
+
+def _ficha(id_, obra_id):
+    return [id_, obra_id, '1', f'Conceito {id_}', '', '', '', '', '', 1]
+
+def _repo():
+    obras = Aba("obras", [core.COLS_OBRAS] + [[i, f'Obra {i}', '', 'AUTOR', '', 'Local', 'Editora', 2000 + i,
+                                               '', '', '', '', '', 0, '', '', 'Livro', 1] for i in range(1, 8)])
+    # Partição A com fichas 1-4 e B com 5-7, mas as obras estão do lado "errado" da faixa
+    a = Aba("fichas_a", [core.COLS_FICHAS] + [_ficha(i, o) for i, o in [(1, 1), (2, 5), (3, 2), (4, 6)]])
+    b = Aba("fichas_b", [core.COLS_FICHAS] + [_ficha(i, o) for i, o in [(5, 7), (6, 3), (7, 4)]])
+    sh = Planilha([obras, a, b])
+    part = core.Particionamento({"criterio": "obra_id", "particoes": [{"aba": "fichas_a", "ate": 3}, {"aba": "fichas_b"}]})
+    return core.Repositorio(sh, particionamento=part), sh
+
+def test_add_depois_do_rebalance_nao_repete_id():
+    repo, sh = _repo()
+    repo.rebalancear()
+    repo.add_ficha(1, '2', 'Nova', '', '', '', '', '')
+    ids = sorted(int(f[0]) for f in repo.get_fichas_completas())
+    assert ids == [1, 2, 3, 4, 5, 6, 7, 8]
+
+def test_rebalance_move_para_a_particao_certa():
+    repo, sh = _repo()
+    repo.rebalancear()
+    obras_a = {int(l[1]) for l in sh.worksheet("fichas_a").linhas[1:]}
+    obras_b = {int(l[1]) for l in sh.worksheet("fichas_b").linhas[1:]}
+    assert obras_a <= {1, 2, 3} and obras_b <= {4, 5, 6, 7}
+    assert len(obras_a) + len(obras_b) == 7
+
+def test_rebalance_nao_apaga_linha_que_mudou_de_lugar():
+    repo, sh = _repo()
+    a = sh.worksheet("fichas_a")
+    batch_get = a.batch_get
+    def app_exclui_ficha_1(ranges):
+        # Simula o app apagando a ficha 1 entre a leitura e a exclusão: as linhas de baixo sobem
+        a.delete_rows(2)
+        return batch_get(ranges)
+    a.batch_get = app_exclui_ficha_1
+    repo.rebalancear()
+    assert [int(l[0]) for l in a.linhas[1:]] == [3, 6]
+    ids_b = sorted(int(l[0]) for l in sh.worksheet("fichas_b").linhas[1:])
+    assert ids_b == [2, 4, 5, 7]
+
+def test_init_db_nao_cria_particoes():
+    repo, sh = _repo()
+    repo.particionamento = core.Particionamento({"criterio": "obra_id", "particoes": [{"aba": "fichas_a", "ate": 3}, {"aba": "fichas_c"}]})
+    repo.init_db()
+    assert "fichas_c" not in sh.abas and {"obras", "fichas"} <= set(sh.abas)
+    repo._criar_particoes()
+    assert sh.worksheet("fichas_c").linhas == [core.COLS_FICHAS]
+
+def test_particao_sem_aba_gera_erro_com_o_nome_da_aba():
+    repo, sh = _repo()
+    repo.particionamento.particoes.append({"aba": "fichas_c"})
+    with pytest.raises(core.AbaAusente, match="fichas_c"):
+        repo.get_fichas_completas()
+    with pytest.raises(core.AbaAusente, match="fichas_c"):
+        repo.add_ficha(1, '2', 'Nova', '', '', '', '', '')
+
+def test_faixas_agrupa_linhas_consecutivas_de_baixo_para_cima():
+    faixas = core._faixas([(5, 'a'), (2, 'b'), (4, 'c'), (9, 'd'), (3, 'e')])
+    assert faixas == [[(9, 'd')], [(5, 'a'), (4, 'c'), (3, 'e'), (2, 'b')]]
@@ -0,0 +1,26 @@
+import os
+import sys
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from referencias import formatar_referencias
+
+def test_formatar_referencias_por_tipo():
+    df = pd.DataFrame([
+        {'id': 1, 'titulo': 'Vigiar e punir', 'subtitulo': 'nascimento da prisão', 'autor': 'FOUCAULT, M.', 'edicao': '2. ed.',
+         'local': 'Petrópolis', 'editora': 'Vozes', 'ano': 1987, 'tipo': 'Livro'},
+        {'id': 2, 'titulo': 'Um título', 'autor': 'SILVA, J.', 'local': 'São Paulo', 'editora': 'Revista X', 'ano': 2020,
+         'volume': '3', 'folhas': '2', 'paginas': '10-20', 'tipo': 'artigo', 'is_online': 1,
+         'url': 'http://x.org', 'data_acesso': '01 jan. 2021'},
+        {'id': 3, 'titulo': 'Estudo', 'autor': 'LIMA, P.', 'local': 'Recife', 'editora': 'UFPE', 'ano': 2019, 'folhas': '120', 'tipo': 'Tese'},
+        {'id': 4, 'titulo': 'Outro', 'autor': 'COSTA, A.', 'local': 'Recife', 'editora': 'UFPE', 'ano': 2018, 'folhas': '90', 'tipo': 'Dissertação'},
+    ])
+    assert list(formatar_referencias(df)) == [
+        "FOUCAULT, M. **Vigiar e punir**: nascimento da prisão. 2. ed. Petrópolis: Vozes, 1987.",
+        "SILVA, J. Um título. **Revista X**, São Paulo, v. 3, n. 2, p. 10-20, 2020. Disponível em: http://x.org. Acesso em: 01 jan. 2021.",
+        "LIMA, P. **Estudo**. 2019. 120 f. Tese (Doutorado) – UFPE, Recife, 2019.",
+        "COSTA, A. **Outro**. 2018. 90 f. Dissertação (Mestrado) – UFPE, Recife, 2018.",
+    ]
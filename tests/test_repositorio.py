@@ -0,0 +1,69 @@
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("pandas")
+pytest.importorskip("gspread")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import core
+from planilha_fake import Aba, Planilha
+
+def _repo(cols_fichas=core.COLS_FICHAS):
+    obras = Aba("obras", [core.COLS_OBRAS, [1, 'Obra', '', 'AUTOR', '', 'Local', 'Editora', 2000,
+                                            '', '', '', '', '', 0, '', '', 'Livro', 1]])
+    fichas = Aba("fichas", [cols_fichas] + [[i, 1, '10', f'Conceito {i}', '', '', '', '', '', 1][:len(cols_fichas)]
+                                            for i in range(1, 4)])
+    sh = Planilha([obras, fichas])
+    return core.Repositorio(sh), fichas
+
+# --- UPDATE ---
+def test_update_envia_so_as_celulas_alteradas_e_sobe_a_versao():
+    repo, fichas = _repo()
+    antes = repo._get_frame("fichas")
+    assert repo.update_ficha(2, {'conceito': 'Novo', 'pagina': '10', 'id': 99}) is True
+    assert [u['range'] for u in fichas.escritas[-1]] == ['D3', 'J3']  # conceito e versao da linha da ficha 2
+    assert fichas.linhas[2][3] == 'Novo' and fichas.linhas[2][9] == '2'
+    # Cache corrigido numa cópia, sem nova leitura; o frame antigo continua intacto para quem já o tinha
+    assert repo.get_versao("fichas", 2) == 2
+    assert antes.loc[antes['id'].astype(str) == '2', 'conceito'].iloc[0] == 'Conceito 2'
+
+def test_update_sem_alteracao_nao_escreve():
+    repo, fichas = _repo()
+    assert repo.update_ficha(2, {'conceito': 'Conceito 2'}) is True
+    assert fichas.escritas == []
+
+def test_update_com_versao_antiga_gera_conflito():
+    repo, fichas = _repo()
+    with pytest.raises(core.ConflitoDeEdicao):
+        repo.update_ficha(2, {'conceito': 'Novo'}, versao=5)
+    assert fichas.escritas == [] and fichas.linhas[2][3] == 'Conceito 2'
+
+def test_update_de_ficha_inexistente_retorna_false():
+    repo, fichas = _repo()
+    assert repo.update_ficha(99, {'conceito': 'Novo'}) is False
+    assert fichas.escritas == []
+
+def test_update_relocaliza_linha_que_mudou_de_lugar():
+    repo, fichas = _repo()
+    repo._get_frame("fichas")
+    fichas.delete_rows(2)  # outra sessão apaga a ficha 1: a ficha 3 sobe para a linha 3
+    assert repo.update_ficha(3, {'conceito': 'Novo'}) is True
+    assert fichas.linhas[2][:4] == ['3', '1', '10', 'Novo']
+
+def test_update_em_planilha_antiga_cria_a_coluna_versao():
+    repo, fichas = _repo(core.COLS_FICHAS[:-1])
+    assert repo.update_ficha(2, {'conceito': 'Novo'}) is True
+    assert fichas.linhas[0][-1] == 'versao' and len(fichas.linhas[0]) == len(core.COLS_FICHAS)
+    assert fichas.linhas[2][9] == '1'
+
+# --- MEMO ---
+def test_memo_nao_guarda_resultado_calculado_durante_uma_escrita():
+    repo, fichas = _repo()
+    def calcular():
+        repo.add_ficha(1, '2', 'Nova', '', '', '', '', '')  # outra sessão grava no meio do cálculo
+        return 'velho'
+    assert repo.memo(('teste',), calcular) == 'velho'
+    assert not repo.em_memo(('teste',))
+    assert repo.memo(('teste',), lambda: 'novo') == 'novo'